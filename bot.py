@@ -1,203 +1,541 @@
 # ==========================================
 # 🤖 STEP 4: THE BOT ENGINE (OPTIMIZED HYBRID MODE)
 # ==========================================
+import os
 import sys
 import re
 import requests
 import telebot
 import time
+import threading
+import itertools
+import inspect
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
-from PIL import Image, ImageOps, ImageEnhance
 import easyocr
 import torch
 
+# orjson parses DexScreener's multi-pair payloads 2-3x faster; stdlib fallback
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
 print("🔄 Booting ScanAlpha Engine v4.4 (OPTIMIZED)...", flush=True)
 
+# Per-step scan tracing is off by default (SCAN_VERBOSE=1 turns it back on);
+# errors and the per-photo outcome are always printed
+SCAN_VERBOSE = os.environ.get('SCAN_VERBOSE', '0') != '0'
+
+def debug(msg):
+    """Print a scan trace line only when SCAN_VERBOSE is set"""
+    if SCAN_VERBOSE:
+        print(msg)
+
 try:
     TOKEN = userdata.get('TELEGRAM_TOKEN')
 except:
     TOKEN = "PASTE_TOKEN_HERE_IF_NOT_USING_SECRETS"
 
-bot = telebot.TeleBot(TOKEN)
-reader = easyocr.Reader(['en'], gpu=True, quantize=False)
+# Worker threads pipeline requests: while one photo holds the OCR stage,
+# others download / preprocess / hit DexScreener concurrently
+bot = telebot.TeleBot(TOKEN, num_threads=4)
+# Best available device: CUDA -> Apple MPS -> CPU
+if torch.cuda.is_available():
+    OCR_DEVICE = 'cuda'
+elif getattr(torch.backends, 'mps', None) and torch.backends.mps.is_available():
+    OCR_DEVICE = 'mps'
+else:
+    OCR_DEVICE = 'cpu'
+print(f"🧠 OCR device: {OCR_DEVICE}", flush=True)
+
+# INT8 recognizer by default (EasyOCR applies it on CPU, where it matters most);
+# OCR_QUANTIZE=0 restores FP32 if accuracy drops
+OCR_QUANTIZE = os.environ.get('OCR_QUANTIZE', '1') != '0'
+reader = easyocr.Reader(['en'], gpu=OCR_DEVICE if OCR_DEVICE != 'cpu' else False,
+                        quantize=OCR_QUANTIZE, cudnn_benchmark=True)
+
+def load_trt_detector(ocr_reader):
+    """Swap the CRAFT detector for a cached FP16 TensorRT engine (GPU only)"""
+    if not torch.cuda.is_available():
+        return False
+    try:
+        import torch_tensorrt
+    except ImportError:
+        return False
+    
+    major, minor = torch.cuda.get_device_capability()
+    engine_path = f"scanalpha_det_sm{major}{minor}_fp16.ts"
+    
+    try:
+        if os.path.exists(engine_path):
+            trt_det = torch.jit.load(engine_path).cuda()
+        else:
+            print("🔧 Building TensorRT detector engine (first boot)...", flush=True)
+            net = ocr_reader.detector
+            net = getattr(net, 'module', net).eval()
+            # Dynamic shape profile: CRAFT pads H/W to multiples of 32, canvas <= 2560
+            trt_det = torch_tensorrt.compile(
+                torch.jit.trace(net, torch.zeros((1, 3, 640, 640), device='cuda')),
+                ir="ts",
+                inputs=[torch_tensorrt.Input(
+                    min_shape=(1, 3, 32, 32),
+                    opt_shape=(2, 3, 1280, 1280),
+                    max_shape=(4, 3, 2560, 2560),
+                    dtype=torch.float32
+                )],
+                enabled_precisions={torch.float32, torch.half}
+            )
+            torch.jit.save(trt_det, engine_path)
+        ocr_reader.detector = trt_det
+        print(f"⚡ TensorRT detector active ({engine_path})", flush=True)
+        return True
+    except Exception as e:
+        print(f"⚠️ TensorRT unavailable, using stock EasyOCR: {e}", flush=True)
+        return False
+
+class _OrtDetector(torch.nn.Module):
+    """CRAFT forward() backed by an ONNX Runtime session"""
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+    
+    def forward(self, x):
+        y, feature = self.session.run(None, {self.input_name: x.cpu().numpy()})
+        return torch.from_numpy(y), torch.from_numpy(feature)
+
+def load_onnx_detector(ocr_reader):
+    """Swap the CRAFT detector for ONNX Runtime (OpenVINO EP if installed) on CPU"""
+    if OCR_DEVICE != 'cpu':
+        return False
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return False
+    
+    model_path = "scanalpha_craft.onnx"
+    
+    try:
+        if not os.path.exists(model_path):
+            print("🔧 Exporting CRAFT detector to ONNX (first boot)...", flush=True)
+            net = ocr_reader.detector
+            net = getattr(net, 'module', net).eval()
+            # Newer torch defaults to the dynamo exporter (needs onnx/onnxscript,
+            # not in requirements) - pin the TorchScript exporter where selectable
+            legacy = ({'dynamo': False}
+                      if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {})
+            torch.onnx.export(
+                net, torch.zeros((1, 3, 640, 640)), model_path,
+                input_names=['input'], output_names=['y', 'feature'],
+                dynamic_axes={'input': {0: 'batch', 2: 'h', 3: 'w'},
+                              'y': {0: 'batch', 1: 'h2', 2: 'w2'},
+                              'feature': {0: 'batch', 2: 'h2', 3: 'w2'}},
+                opset_version=17,
+                **legacy
+            )
+        available = ort.get_available_providers()
+        providers = [p for p in ('OpenVINOExecutionProvider', 'CPUExecutionProvider') if p in available]
+        session = ort.InferenceSession(model_path, providers=providers)
+        ocr_reader.detector = _OrtDetector(session)
+        print(f"⚡ ONNX Runtime detector active ({session.get_providers()[0]})", flush=True)
+        return True
+    except Exception as e:
+        print(f"⚠️ ONNX Runtime unavailable, using stock EasyOCR: {e}", flush=True)
+        return False
+
+load_trt_detector(reader) or load_onnx_detector(reader)
+
+# EasyOCR isn't safe for concurrent readtext calls - serialize the GPU stage
+_OCR_LOCK = threading.Lock()
+
+# Warm up CUDA/cudnn once so the first user doesn't pay for it.
+# A blank frame yields no boxes and never reaches the recognizer, so draw
+# some text to push both networks through their first forward pass.
+_WARMUP = np.full((2, 64, 256, 3), 255, dtype=np.uint8)
+for _frame in _WARMUP:
+    cv2.putText(_frame, "So1ana42Ab", (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 0), 2)
+try:
+    reader.readtext_batched(_WARMUP)
+except Exception as e:
+    print(f"⚠️ OCR warmup skipped: {e}", flush=True)
 
 # HYBRID CHARACTER SET (From working script)
 HYBRID_CHARS = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz0OIl5S"
 
+# PRECOMPILED PATTERNS (hot path - compiled once at boot)
+_RE_EXACT_B58 = re.compile(r'[1-9A-HJ-NP-Za-km-z]{32,44}')
+_RE_ALNUM_STRIP = re.compile(r'[^A-Za-z0-9]')
+
+# BASE58 DELETE TABLE (str.translate runs the char test in C)
+BASE58_CHARS = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_DEL_B58 = str.maketrans('', '', BASE58_CHARS)
+_B58_BYTES = BASE58_CHARS.encode('ascii')
+_DIGIT_BYTES = b'123456789'
+
+def _b58_ratio(candidate):
+    """Fraction of Base58 characters in candidate"""
+    return 1 - len(candidate.translate(_DEL_B58)) / len(candidate)
+
+_DEL_DIGITS = str.maketrans('', '', '0123456789')
+
+def _has_digit_and_alpha(s):
+    """One C pass: digit AND letter present (s must be ASCII alphanumeric)"""
+    letters = len(s.translate(_DEL_DIGITS))
+    return 0 < letters < len(s)
+
+# ==========================================
+# 🗃️ CACHES
+# ==========================================
+class TTLCache:
+    """Tiny thread-safe LRU with per-entry expiry"""
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if time.time() - item[0] > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+# Same screenshot -> same OCR text; price data only needs ~30s freshness
+# (_OCR_CACHE is created next to OCR_STRATEGIES - it holds one entry per pass)
+OCR_CACHE_IMAGES = 512
+_DEX_CACHE = TTLCache(maxsize=2048, ttl=30)
+
 # ==========================================
 # 🖼️ IMAGE PROCESSING - OPTIMIZED
 # ==========================================
-def get_multi_scale_images(input_path):
+# Same weights as ImageEnhance.Sharpness(1.5): 1.5*img - 0.5*SMOOTH(img)
+_SHARPEN_KERNEL = (np.array([[0, 0, 0], [0, 1.5, 0], [0, 0, 0]], dtype=np.float32) -
+                   0.5 * np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13)
+
+def decode_gray(image):
+    """Decode raw bytes / file path to grayscale; arrays pass through"""
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, (bytes, bytearray)):
+        return cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_GRAYSCALE)
+    return cv2.imread(image, cv2.IMREAD_GRAYSCALE)
+
+# Both branches are pure cv2/NumPy (GIL released) - run them side by side.
+# Cap cv2's own threads so the two branches don't oversubscribe the CPU.
+cv2.setNumThreads(max(1, (os.cpu_count() or 2) // 2))
+_PP_POOL = ThreadPoolExecutor(max_workers=2)
+
+# Per-worker scratch buffers for intermediates (returned images stay fresh,
+# they outlive the call while waiting on OCR)
+_BUFS = threading.local()
+
+def _scratch(name, shape, dtype=np.uint8):
+    """Reusable per-thread buffer; reallocated only when the shape changes"""
+    buf = getattr(_BUFS, name, None)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = np.empty(shape, dtype=dtype)
+        setattr(_BUFS, name, buf)
+    return buf
+
+# Past ~2000px on the short side OCR gains nothing (EasyOCR's detector canvas
+# is 2560px anyway) - clamp the upscale instead of always multiplying
+OCR_MAX_SHORT_SIDE = 2000
+
+def upscale_factor(shape, base):
+    """base, clamped so the upscaled short side stays <= OCR_MAX_SHORT_SIDE"""
+    return min(base, max(1.0, OCR_MAX_SHORT_SIDE / min(shape[:2])))
+
+def _upscale(gray, scale):
+    """Bicubic upscale for small text (shared by both branches)"""
+    h, w = gray.shape
+    new_w, new_h = int(w * scale), int(h * scale)
+    # Bicubic (4x4 taps) vs Lanczos4 (8x8): same text legibility after sharpen
+    return cv2.resize(gray, (new_w, new_h), dst=_scratch('upscaled', (new_h, new_w)),
+                      interpolation=cv2.INTER_CUBIC)
+
+def _branch_threshold(cv_img):
+    """1. GAUSSIAN ADAPTIVE THRESHOLDING (KEY FIX from working script)"""
+    # Adaptive Gaussian Thresholding
+    thresh = cv2.adaptiveThreshold(cv_img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                  cv2.THRESH_BINARY, 31, 10, dst=_scratch('thresh', cv_img.shape))
+    
+    # Invert for EasyOCR (prefers black text on white background)
+    return cv2.bitwise_not(thresh)
+
+def _branch_enhance(resized):
+    """2. Contrast/sharpen on the bicubic upscale (ex-PIL branch, now cv2)"""
+    # Contrast (2.0x around mean) is pointwise -> one uint8 LUT pass
+    mean = cv2.mean(resized)[0]
+    lut = np.clip(np.arange(256, dtype=np.float32) * 2.0 - mean, 0, 255).astype(np.uint8)
+    contrast = cv2.LUT(resized, lut, dst=_scratch('contrast', resized.shape))
+    
+    # Sharpen straight into the (fresh, saturated uint8) output image
+    return cv2.filter2D(contrast, -1, _SHARPEN_KERNEL)
+
+def get_multi_scale_images(gray):
     """Optimized image processing"""
     images = []
     
     try:
-        # 1. GAUSSIAN ADAPTIVE THRESHOLDING (KEY FIX from working script)
-        cv_img = cv2.imread(input_path, cv2.IMREAD_GRAYSCALE)
-        
-        if cv_img is not None:
-            # Upscale 2x for small text
-            cv_img = cv2.resize(cv_img, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
-            
-            # Adaptive Gaussian Thresholding
-            thresh = cv2.adaptiveThreshold(cv_img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                          cv2.THRESH_BINARY, 31, 10)
-            
-            # Invert for EasyOCR (prefers black text on white background)
-            final_scan = cv2.bitwise_not(thresh)
-            images.append(final_scan)
-            
-        # 2. Original PIL Processing (scaled back)
-        with Image.open(input_path) as img:
-            img = img.convert('RGB')
-            w, h = img.size
-            
-            # Use only 2.5x scale (best balance)
-            scale = 2.5
-            new_w, new_h = int(w * scale), int(h * scale)
-            resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            img_proc = ImageOps.grayscale(resized)
-            img_proc = ImageEnhance.Contrast(img_proc).enhance(2.0)
-            img_proc = ImageEnhance.Sharpness(img_proc).enhance(1.5)
-            images.append(np.array(img_proc))
+        # Both branches work from the same grayscale buffer
+        if gray is not None:
+            # One shared scale (2.5x best balance, capped for large captures):
+            # both outputs come out the same size, so readtext_batched
+            # doesn't have to re-resize the thresholded image
+            scale = upscale_factor(gray.shape, 2.5)
+            debug(f"   🔍 Upscale {gray.shape[1]}x{gray.shape[0]}: x{scale:.2f}")
+            # Both branches used the identical bicubic resize - do it once
+            # (cv2 threads it internally) and fan out over the shared result
+            up = _upscale(gray, scale)
+            futs = [_PP_POOL.submit(_branch_threshold, up),
+                    _PP_POOL.submit(_branch_enhance, up)]
+            images = [img for img in (f.result() for f in futs) if img is not None]
             
     except Exception as e:
         print(f"⚠️ Image processing error: {e}")
         # Fallback
-        img = cv2.imread(input_path, cv2.IMREAD_GRAYSCALE)
-        if img is not None:
-            images.append(img)
+        if gray is not None:
+            images.append(gray)
     
     return images
 
-def extract_text_from_images(image_path):
-    """Extract text using OPTIMIZED OCR strategies"""
-    all_text = []
+# Use only 2 strategies instead of 4 - most precise first, so the caller
+# can stop as soon as pass 1 already yields a valid address
+OCR_STRATEGIES = [
+    # STRATEGY 1: HYBRID CHARACTER SET (primary)
+    dict(allowlist=HYBRID_CHARS, width_ths=0.7, height_ths=0.7, min_size=2, paragraph=False),
+    # STRATEGY 2: Very lenient (for social media)
+    dict(width_ths=1.5, height_ths=1.5, ycenter_ths=1.0, text_threshold=0.3, low_text=0.3),
+]
+
+# Keyed (image, pass index): size it so OCR_CACHE_IMAGES screenshots fit whole
+_OCR_CACHE = TTLCache(maxsize=OCR_CACHE_IMAGES * len(OCR_STRATEGIES), ttl=3600)
+
+def prepare_ocr_images(image):
+    """Decode + preprocess once; returns the image batch for readtext_batched"""
+    # Decode in memory - no disk round-trip
+    gray = decode_gray(image)
     
     # Get enhanced images
-    images = get_multi_scale_images(image_path)
+    images = get_multi_scale_images(gray)
     
     if not images:
         # Fallback to original image
-        images = [cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)]
+        images = [gray]
     
-    # Use only 2 strategies instead of 4
-    for img in images:
-        try:
-            # STRATEGY 1: HYBRID CHARACTER SET (primary)
-            results1 = reader.readtext(
-                img,
-                detail=0,
-                allowlist=HYBRID_CHARS,
-                batch_size=4,
-                width_ths=0.7,
-                height_ths=0.7,
-                min_size=2,
-                paragraph=False
-            )
-            all_text.extend(results1)
-            
-            # STRATEGY 2: Very lenient (for social media)
-            results2 = reader.readtext(
-                img,
+    return [img for img in images if img is not None]
+
+def run_ocr_strategy(images, params):
+    """One batched OCR pass over all scales; None if OCR failed"""
+    # Batch all scales into one detector pass (preprocessing already emits a
+    # common size; the max() only matters for the raw-image fallback)
+    n_height = max(img.shape[0] for img in images)
+    n_width = max(img.shape[1] for img in images)
+    
+    try:
+        with _OCR_LOCK, torch.inference_mode():
+            results = reader.readtext_batched(
+                images,
+                n_width=n_width,
+                n_height=n_height,
                 detail=0,
-                batch_size=4,
-                width_ths=1.5,
-                height_ths=1.5,
-                ycenter_ths=1.0,
-                text_threshold=0.3,
-                low_text=0.3
+                batch_size=32,
+                **params
             )
-            all_text.extend(results2)
-            
-        except Exception as e:
-            continue
+    except Exception as e:
+        print(f"⚠️ OCR error: {e}")
+        return None
     
-    # Clean and deduplicate
+    # Clean: filter out very short or common words
     clean_text = []
+    for result in results:
+        for text in result:
+            text = str(text).strip()
+            if (text and len(text) >= 5 and
+                not text.isalpha() and  # Not pure letters
+                not text.isdigit()):    # Not pure numbers
+                clean_text.append(text)
+    return clean_text
+
+def iter_text_passes(image, cache_key=None):
+    """Yield new text chunks per OCR strategy, lazily (bytes, path or array,
+    or a no-arg callable returning one - only called if a pass isn't cached)"""
+    # Re-sent screenshots skip preprocessing + OCR entirely (cached per pass
+    # under the caller's cache_key; no key -> no caching)
+    images = None
     seen = set()
-    for text in all_text:
-        text = str(text).strip()
-        # Filter out very short or common words
-        if (text and len(text) >= 5 and text not in seen and
-            not text.isalpha() and  # Not pure letters
-            not text.isdigit()):    # Not pure numbers
-            seen.add(text)
-            clean_text.append(text)
     
-    return clean_text
+    for idx, params in enumerate(OCR_STRATEGIES):
+        chunks = _OCR_CACHE.get((cache_key, idx)) if cache_key else None
+        if chunks is not None:
+            debug(f"   ♻️ OCR cache hit (pass {idx + 1})")
+        else:
+            if images is None:
+                if callable(image):
+                    image = image()
+                images = prepare_ocr_images(image)
+            if not images:
+                return
+            chunks = run_ocr_strategy(images, params)
+            if chunks is None:
+                continue
+            if cache_key:
+                _OCR_CACHE.set((cache_key, idx), tuple(chunks))
+        
+        new_chunks = [c for c in dict.fromkeys(chunks) if c not in seen]
+        seen.update(new_chunks)
+        yield new_chunks
 
 # ==========================================
 # ⛏️ OPTIMIZED HYDRA MINE EXTRACTION
 # ==========================================
+# OCR confusion table (built once, not per call)
+_CONFUSIONS = {
+    '0': ['D', 'O', 'Q'],
+    'O': ['D', '0', 'Q'],
+    'l': ['1', 'I'],
+    'I': ['1', 'l'],
+    'A': ['4'],
+    '4': ['A'],
+    'B': ['8'],
+    '8': ['B'],
+    'S': ['5'],
+    '5': ['S'],
+    'G': ['6'],
+    '6': ['G'],
+    '7': ['T'],
+    'T': ['7'],
+    'Z': ['2'],
+    '2': ['Z']
+}
+
+# Byte-level view: choices per confusable byte (original first) + a C-level
+# scanner so non-confusable chars never hit a Python dict lookup
+_CONFUSION_BYTES = {ord(k): [ord(k)] + [ord(x) for x in v] for k, v in _CONFUSIONS.items()}
+_RE_CONFUSABLE = re.compile('[' + re.escape(''.join(_CONFUSIONS)) + ']')
+
+# OCR misreads rarely stack up - cap each variant at this many substitutions
+MAX_MUTATION_EDITS = 2
+
+def _base58_variants(candidate, positions):
+    """Variants with 1..MAX_MUTATION_EDITS swaps (fewest first), pure Base58 only"""
+    orig = candidate.encode('ascii')
+    # k starts at 1: the caller already has the as-read candidate
+    for k in range(1, MAX_MUTATION_EDITS + 1):
+        for picked in itertools.combinations(positions, k):
+            # [1:] skips the original byte - every picked position really changes
+            for combo in itertools.product(*(_CONFUSION_BYTES[orig[i]][1:] for i in picked)):
+                buf = bytearray(orig)
+                for i, b in zip(picked, combo):
+                    buf[i] = b
+                # A leftover 0/O/I/l can never be a valid address - don't spend a slot
+                if not buf.translate(None, _B58_BYTES):
+                    yield buf.decode('ascii')
+
 def mutate_dirty_string(candidate):
-    """Optimized mutation - limited variations"""
-    mutations = {candidate}
-    confusions = {
-        '0': ['D', 'O', 'Q'],
-        'O': ['D', '0', 'Q'],
-        'l': ['1', 'I'],
-        'I': ['1', 'l'],
-        'A': ['4'],
-        '4': ['A'],
-        'B': ['8'],
-        '8': ['B'],
-        'S': ['5'],
-        '5': ['S'],
-        'G': ['6'],
-        '6': ['G'],
-        '7': ['T'],
-        'T': ['7']
-    }
-    
-    # Only mutate first 3 ambiguous characters to limit variations
-    ambiguous_count = 0
-    for i, char in enumerate(candidate):
-        if char in confusions and ambiguous_count < 3:
-            ambiguous_count += 1
-            for replacement in confusions[char]:
-                new_variant = candidate[:i] + replacement + candidate[i+1:]
-                mutations.add(new_variant)
-    
-    return list(mutations)[:10]  # Limit to 10 variations
+    """Optimized mutation - limited variations (generator, ASCII candidate)"""
+    # Only consider 3 ambiguous characters to limit variations; the non-Base58
+    # look-alikes (0/O/I/l) must change, so they get those slots first
+    found = [m.start() for m in _RE_CONFUSABLE.finditer(candidate)]
+    positions = sorted(found, key=lambda i: candidate[i] in BASE58_CHARS)[:3]
+    
+    # Lazy: real variants only (never the candidate itself); bounded to 10
+    return itertools.islice(_base58_variants(candidate, positions), 10)
 
+@lru_cache(maxsize=4096)  # OCR noise repeats a lot across passes
 def is_likely_solana(candidate):
-    """Strict check if string looks like Solana address"""
+    """Strict check if string (or ASCII bytes) looks like Solana address"""
     if len(candidate) < 32 or len(candidate) > 44:
         return False
     
+    # Work on bytes: translate/set run over small ints in C
+    b = candidate.encode('ascii', 'replace') if isinstance(candidate, str) else bytes(candidate)
+    
     # Must be Base58 with no confusing chars
-    if re.search(r'[^1-9A-HJ-NP-Za-km-z]', candidate):
+    if b.translate(None, _B58_BYTES):
         return False
     
-    # Must have both letters and numbers
-    if not (re.search(r'\d', candidate) and re.search(r'[A-Za-z]', candidate)):
+    # Must have both letters and numbers (all Base58 here, so letters = non-digits)
+    letters = len(b.translate(None, _DIGIT_BYTES))
+    if letters == 0 or letters == len(b):
         return False
     
     # Must have reasonable character diversity (not just repeating patterns)
-    unique_chars = len(set(candidate))
+    unique_chars = len(set(b))
     if unique_chars < 10:
         return False
     
     return True
 
-def optimized_hydra_mine(text_results):
+# 256-byte LUTs: bytes.translate classifies every byte in one C pass, then
+# split() yields the runs - no regex engine involved
+_DIRTY_RUN_LUT = bytes(c if chr(c) in BASE58_CHARS + '0OIl' else 0x20 for c in range(256))
+_CLEAN_RUN_LUT = bytes(c if chr(c) in BASE58_CHARS else 0x20 for c in range(256))
+
+def _split_run(run, lo, hi):
+    """re.findall('[class]{lo,hi}') restricted to one maximal run of that class"""
+    return [run[p:p + hi] for p in range(0, len(run), hi) if len(run) - p >= lo]
+
+def scan_base58_runs(text):
+    """Single LUT pass -> (exact 32-44, long 45-100, dirty 32-44) matches"""
+    exact, long_chunks, dirty = [], [], []
+    # Non-ASCII becomes '?' (1 char -> 1 byte), which the LUT maps to a separator
+    data = text.encode('ascii', 'replace')
+    for run in data.translate(_DIRTY_RUN_LUT).split():
+        if len(run) < 32:
+            continue
+        dirty.extend(_split_run(run.decode('ascii'), 32, 44))
+        # Clean Base58 runs are the dirty run split on the look-alikes
+        for clean in run.translate(_CLEAN_RUN_LUT).split():
+            clean = clean.decode('ascii')
+            exact.extend(_split_run(clean, 32, 44))
+            long_chunks.extend(_split_run(clean, 45, 100))
+    return exact, long_chunks, dirty
+
+def optimized_hydra_mine(text_results, with_mutations=True, fast_path=True):
     """OPTIMIZED extraction - generates far fewer candidates"""
     all_candidates = []
-    base58_chars = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
     
     # Join all text but keep track of original chunks
     full_stream = "".join(text_results)
     
     # STRATEGY 1: Look for exact Base58 strings 32-44 chars
-    exact_matches = re.findall(r'[1-9A-HJ-NP-Za-km-z]{32,44}', full_stream)
+    # One scan feeds strategies 1-3
+    exact_matches, long_base58_chunks, dirty_matches = scan_base58_runs(full_stream)
+    
+    # Fast path: clean OCR usually gives the address verbatim - skip 2-4.
+    # Off for the fallback round: a clean piece split off a misread CA (or a
+    # wallet next to it) would otherwise hide the dirty run and its mutations
+    likely = fast_path and list(dict.fromkeys(m for m in exact_matches if is_likely_solana(m)))
+    if likely:
+        debug(f"   ⛏️ Fast path: {len(likely)} exact candidate(s)")
+        return likely
+    
     all_candidates.extend(exact_matches)
     
     # STRATEGY 2: Look for longer Base58 strings and extract 32-44 char substrings from them
-    long_base58_chunks = re.findall(r'[1-9A-HJ-NP-Za-km-z]{45,100}', full_stream)
-    for chunk in long_base58_chunks:
+    for chunk in dict.fromkeys(long_base58_chunks):  # Skip repeats (same text, two scales)
         # Take first 44 chars, last 44 chars, and middle section
         if len(chunk) >= 44:
             all_candidates.append(chunk[:44])
@@ -209,13 +547,13 @@ def optimized_hydra_mine(text_results):
                 all_candidates.append(chunk[start:start+44])
     
     # STRATEGY 3: Look for strings with confusing chars
-    dirty_matches = re.findall(r'[1-9A-HJ-NP-Za-km-z0OIl5S]{32,44}', full_stream)
-    for match in dirty_matches:
+    for match in dict.fromkeys(dirty_matches):  # No re-mutating repeated matches
         # Only add if it looks promising
-        if re.search(r'\d', match) and re.search(r'[A-Za-z]', match):
+        if _has_digit_and_alpha(match):
             all_candidates.append(match)
             # Limited mutations
-            all_candidates.extend(mutate_dirty_string(match)[:3])
+            if with_mutations:
+                all_candidates.extend(itertools.islice(mutate_dirty_string(match), 3))
     
     # STRATEGY 4: Check individual text chunks that look like addresses
     for chunk in text_results:
@@ -227,79 +565,123 @@ def optimized_hydra_mine(text_results):
                 all_candidates.append(clean)
         
         # Check if chunk itself looks like an address
-        clean_chunk = re.sub(r'[^A-Za-z0-9]', '', chunk_str)
+        clean_chunk = _RE_ALNUM_STRIP.sub('', chunk_str)
         if 32 <= len(clean_chunk) <= 44:
-            if re.search(r'\d', clean_chunk) and re.search(r'[A-Za-z]', clean_chunk):
+            if _has_digit_and_alpha(clean_chunk):
                 all_candidates.append(clean_chunk)
     
-    # Remove duplicates and invalid candidates
-    unique_candidates = []
-    seen = set()
+    # Remove duplicates (C-level, order preserving) and invalid candidates
+    # Stops filtering as soon as the 500 cap is reached
+    unique_candidates = list(itertools.islice(
+        (cand for cand in dict.fromkeys(all_candidates)
+         if 32 <= len(cand) <= 44 and _b58_ratio(cand) > 0.9),  # At least 90% Base58
+        500))  # LIMIT to 500 candidates max!
     
-    for cand in all_candidates:
-        if cand not in seen:
-            seen.add(cand)
-            # Quick filter before expensive check
-            if 32 <= len(cand) <= 44:
-                # Count Base58 chars
-                base58_count = sum(1 for c in cand if c in base58_chars)
-                if base58_count / len(cand) > 0.9:  # At least 90% Base58
-                    unique_candidates.append(cand)
-    
-    print(f"   ⛏️ Generated {len(unique_candidates)} candidates (optimized)")
-    return unique_candidates[:500]  # LIMIT to 500 candidates max!
+    debug(f"   ⛏️ Generated {len(unique_candidates)} candidates (optimized)")
+    return unique_candidates
 
 # ==========================================
 # 🔍 MAIN ADDRESS FINDING FUNCTION
 # ==========================================
+# Shared keep-alive pool for DexScreener (no TLS handshake per batch);
+# transient connect errors and rate-limit / 5xx replies retry on the warm pool
+# instead of failing the batch. Read timeouts are not retried: a hung GET
+# costs one timeout and surfaces as requests' Timeout
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=8,
+                                       max_retries=Retry(total=2, read=False, backoff_factor=0.2,
+                                                         status_forcelist=(429, 500, 502, 503, 504),
+                                                         # Retry-After is unbounded and slept while
+                                                         # holding a _DEX_SLOTS slot - use backoff only
+                                                         respect_retry_after_header=False,
+                                                         raise_on_status=False)))
+DEX_WORKERS = 8
+# Each handler thread fans out up to DEX_WORKERS batches; cap the total in
+# flight across all of them to the pool size so bursts queue here instead
+# of tripping DexScreener's rate limit (and its 429 backoff)
+_DEX_SLOTS = threading.BoundedSemaphore(DEX_WORKERS)
+
+def fetch_dex_batch(batch_no, batch):
+    """Fetch pairs for one comma-joined batch of addresses (None on failure)"""
+    try:
+        query_string = ",".join(batch)
+        url = f"https://api.dexscreener.com/latest/dex/tokens/{query_string}"
+        with _DEX_SLOTS:
+            # (connect, read): retried connects fail fast while a slot is held
+            response = _SESSION.get(url, timeout=(3.05, 10))
+        if response.status_code == 200:
+            data = json_loads(response.content)
+            return data.get('pairs') or []
+    except requests.exceptions.Timeout:
+        print(f"   - Timeout on batch {batch_no}")
+    except Exception as e:
+        print(f"   - Batch error: {type(e).__name__}")
+    return None
+
 def batch_check_dex(candidates):
     """Batch check candidates with DexScreener - OPTIMIZED"""
     if not candidates:
         return []
     
     # Filter and deduplicate
-    unique_candidates = list(set(candidates))
-    clean_candidates = []
+    clean_candidates = [cand for cand in dict.fromkeys(candidates) if is_likely_solana(cand)]
     
-    for cand in unique_candidates:
-        if is_likely_solana(cand):
-            clean_candidates.append(cand)
-    
-    print(f"   - Checking {len(clean_candidates)} likely candidates...")
+    debug(f"   - Checking {len(clean_candidates)} likely candidates...")
     
     if not clean_candidates:
         return []
     
+    # Recently checked addresses (hits and misses) come from the cache
     valid_pairs = []
-    chunk_size = 10  # Smaller chunks to avoid timeouts
-    
-    for i in range(0, len(clean_candidates), chunk_size):
-        batch = clean_candidates[i : i + chunk_size]
-        try:
-            query_string = ",".join(batch)
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{query_string}"
-            response = requests.get(url, timeout=10)  # Longer timeout
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('pairs'):
-                    valid_pairs.extend(data['pairs'])
-        except requests.exceptions.Timeout:
-            print(f"   - Timeout on batch {i//chunk_size + 1}")
-            continue
-        except Exception as e:
-            print(f"   - Batch error: {type(e).__name__}")
-            continue
+    to_fetch = []
+    for cand in clean_candidates:
+        cached = _DEX_CACHE.get(cand)
+        if cached is None:
+            to_fetch.append(cand)
+        else:
+            valid_pairs.extend(cached)
+    
+    if not to_fetch:
+        return valid_pairs
+    
+    chunk_size = 30  # DexScreener max addresses per tokens/ call
+    batches = [to_fetch[i : i + chunk_size]
+               for i in range(0, len(to_fetch), chunk_size)]
+    
+    # Fire all batches concurrently - network bound, threads are fine
+    with ThreadPoolExecutor(max_workers=min(DEX_WORKERS, len(batches))) as ex:
+        results = ex.map(fetch_dex_batch, range(1, len(batches) + 1), batches)
+        for batch, pairs in zip(batches, results):
+            if pairs is None:
+                continue  # Failed batch - don't cache
+            valid_pairs.extend(pairs)
+            
+            by_addr = {addr: [] for addr in batch}
+            for pair in pairs:
+                for side in ('baseToken', 'quoteToken'):
+                    addr = pair.get(side, {}).get('address')
+                    if addr in by_addr:
+                        by_addr[addr].append(pair)
+            for addr, addr_pairs in by_addr.items():
+                _DEX_CACHE.set(addr, addr_pairs)
     
     return valid_pairs
 
 def find_solana_address_in_text(text_chunks):
     """Main address finding function - OPTIMIZED"""
-    print("   🔄 Running OPTIMIZED extraction...")
-    
-    # Try optimized hydra_mine
-    candidates = optimized_hydra_mine(text_chunks)
-    
-    if candidates:
+    debug("   🔄 Running OPTIMIZED extraction...")
+    
+    # Try optimized hydra_mine - OCR-confusion mutations only if the
+    # as-read candidates don't resolve (common case: one call, no variants)
+    checked = set()
+    for with_mutations in (False, True):
+        candidates = [c for c in optimized_hydra_mine(text_chunks, with_mutations,
+                                                      fast_path=not with_mutations)
+                      if c not in checked]
+        if not candidates:
+            continue
+        checked.update(candidates)
+        
         valid_pairs = batch_check_dex(candidates)
         
         if valid_pairs:
@@ -311,9 +693,9 @@ def find_solana_address_in_text(text_chunks):
             return ca, best_pair
     
     # Fallback: Direct pattern matching in text chunks
-    print("   🔄 Trying direct pattern matching...")
-    base58_chars = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    debug("   🔄 Trying direct pattern matching...")
     
+    matches = []
     for chunk in text_chunks:
         chunk_str = str(chunk).strip()
         
@@ -322,28 +704,30 @@ def find_solana_address_in_text(text_chunks):
             chunk_str = chunk_str[:-3]
         
         # Look for Base58 strings 32-44 chars
-        matches = re.findall(r'[1-9A-HJ-NP-Za-km-z]{32,44}', chunk_str)
-        for match in matches:
-            if is_likely_solana(match):
-                # Check directly
-                try:
-                    url = f"https://api.dexscreener.com/latest/dex/tokens/{match}"
-                    response = requests.get(url, timeout=5)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('pairs'):
-                            ca = match
-                            pair = data['pairs'][0]
-                            print(f"✅ Found via direct match: {ca[:15]}...")
-                            return ca, pair
-                except:
-                    continue
+        matches.extend(_RE_EXACT_B58.findall(chunk_str))
+    
+    # One batched lookup instead of a GET per match (filters is_likely_solana)
+    pairs_by_addr = {}
+    for pair in batch_check_dex(matches):
+        for side in ('baseToken', 'quoteToken'):
+            pairs_by_addr.setdefault(pair.get(side, {}).get('address'), pair)
+    
+    # First match in text order wins, as before
+    for match in dict.fromkeys(matches):
+        if match in pairs_by_addr:
+            ca = match
+            pair = pairs_by_addr[match]
+            print(f"✅ Found via direct match: {ca[:15]}...")
+            return ca, pair
     
     return None, None
 
 # ==========================================
 # 💬 MESSAGE HANDLERS (UNCHANGED)
 # ==========================================
+# Independent Telegram round-trips inside one handler run side by side
+_IO_POOL = ThreadPoolExecutor(max_workers=4)
+
 def send_success_msg(message, ca, pair, time_taken):
     """Send success message with token info"""
     fdv = pair.get('fdv', 0)
@@ -392,21 +776,39 @@ def handle_photo(message):
     print(f"📩 Processing image from {user_info}...", flush=True)
     
     try:
-        # Send initial status
-        status = bot.reply_to(message, "🔍 **Scanning image (OPTIMIZED)...**")
+        # Send initial status while the photo downloads (both network-bound)
+        status_fut = _IO_POOL.submit(bot.reply_to, message, "🔍 **Scanning image (OPTIMIZED)...**")
         
-        # Download the photo
-        file_info = bot.get_file(message.photo[-1].file_id)
-        downloaded_file = bot.download_file(file_info.file_path)
+        photo = message.photo[-1]
         
-        # Save to disk
-        filename = f"scan_{int(time.time())}.jpg"
-        with open(filename, 'wb') as f:
-            f.write(downloaded_file)
+        def download_photo():
+            file_info = bot.get_file(photo.file_id)
+            return bot.download_file(file_info.file_path)
         
-        # Extract text from image
-        print("   Extracting text...")
-        text_chunks = extract_text_from_images(filename)
+        # Extract text pass by pass and stop OCR as soon as the text so far
+        # yields a token. Telegram's file_unique_id is stable for the same
+        # upload, so passes cached for a re-sent photo skip get_file +
+        # download + OCR; the photo is only fetched for an uncached pass
+        debug("   Extracting text...")
+        text_passes = iter_text_passes(download_photo, cache_key=photo.file_unique_id)
+        
+        text_chunks = []
+        ca, pair = None, None
+        for new_chunks in text_passes:
+            if not new_chunks:
+                continue
+            text_chunks.extend(new_chunks)
+            
+            debug(f"📝 Found {len(text_chunks)} text chunks")
+            if SCAN_VERBOSE:
+                print(f"📝 Sample text (first 3): {text_chunks[:3]}")
+            
+            # Find Solana address
+            debug("   Searching for Solana address...")
+            ca, pair = find_solana_address_in_text(text_chunks)
+            if ca and pair:
+                break
+        status = status_fut.result()
         
         if not text_chunks:
             bot.edit_message_text(
@@ -417,19 +819,13 @@ def handle_photo(message):
             )
             return
         
-        print(f"📝 Found {len(text_chunks)} text chunks")
-        if len(text_chunks) > 0:
-            print(f"📝 Sample text (first 3): {text_chunks[:3]}")
-        
-        # Find Solana address
-        print("   Searching for Solana address...")
-        ca, pair = find_solana_address_in_text(text_chunks)
-        
         total_time = time.time() - start_time
         
         if ca and pair:
+            # Result reply and status cleanup are independent round-trips
+            delete_fut = _IO_POOL.submit(bot.delete_message, message.chat.id, status.message_id)
             send_success_msg(message, ca, pair, total_time)
-            bot.delete_message(message.chat.id, status.message_id)
+            delete_fut.result()
             print(f"✅ Success! Found token in {total_time:.2f}s")
         else:
             # Show debug info
@@ -498,11 +894,12 @@ def handle_text(message):
 print("✅ ScanAlpha LIVE v4.4 (OPTIMIZED)!", flush=True)
 print("🤖 Bot is ready to receive screenshots...", flush=True)
 
-# Start polling
+# Start polling (skip the backlog queued while offline - a restart would
+# otherwise push every stale screenshot through the OCR lock at once)
 try:
-    bot.infinity_polling(timeout=60, long_polling_timeout=60)
+    bot.infinity_polling(timeout=60, long_polling_timeout=60, skip_pending=True)
 except Exception as e:
     print(f"❌ Polling error: {e}", flush=True)
     print("🔄 Restarting bot...", flush=True)
     time.sleep(5)
-    bot.infinity_polling()
\ No newline at end of file
+    bot.infinity_polling(skip_pending=True)
\ No newline at end of file